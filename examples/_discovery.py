@@ -0,0 +1,18 @@
+"""
+Discovery file helper shared by the example agents.
+The discovery file is written once per VS session, so it is read and parsed at most once per process.
+"""
+
+import functools
+import os
+import tempfile
+
+from _jsonlib import loads
+
+DISCOVERY_FILE = os.path.join(tempfile.gettempdir(), "agentic_debugger.json")
+
+@functools.lru_cache(maxsize=1)
+def load_discovery():
+    """Read connection info (port, API key) from %TEMP%\\agentic_debugger.json"""
+    with open(DISCOVERY_FILE, "rb") as f:
+        return loads(f.read())
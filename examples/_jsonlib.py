@@ -0,0 +1,17 @@
+"""
+JSON helpers shared by the example agents.
+Uses orjson when installed (pip install orjson), stdlib json otherwise.
+"""
+
+try:
+    import orjson
+
+    loads = orjson.loads
+    dumps = orjson.dumps  # Returns bytes
+except ImportError:
+    import json
+
+    loads = json.loads
+
+    def dumps(obj):
+        return json.dumps(obj).encode()
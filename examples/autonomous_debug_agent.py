@@ -7,124 +7,219 @@ Demonstrates an AI agent that:
 4. Validates with test runs
 """
 
-import requests
-import json
-import tempfile
-import os
-import websocket
-import threading
-import time
+import asyncio
+from itertools import islice
+import aiohttp  # pip install aiohttp
+import logging
+import sys
+import websockets  # pip install websockets
+from _discovery import load_discovery
+from _jsonlib import loads, dumps
 
 # Discovery
-discovery_file = os.path.join(tempfile.gettempdir(), "agentic_debugger.json")
-with open(discovery_file, 'r') as f:
-    discovery = json.load(f)
+discovery = load_discovery()
 
 BASE_URL = f"http://localhost:{discovery['port']}"
 WS_URL = f"ws://localhost:{discovery['port']}/ws"
 API_KEY = discovery['defaultApiKey']
 HEADERS = {discovery['keyHeader']: API_KEY}
 
+# %-style arguments are only formatted when the level is enabled
+log = logging.getLogger("agent")
+log.setLevel(logging.INFO)
+
+# Error pattern -> fix suggestions (in real agent, use LLM here)
+def _missing_import_suggestions(file_path, line):
+    return ["Missing import or undefined variable", f"Action: Check imports at {file_path}"]
+
+def _null_ref_suggestions(file_path, line):
+    return ["Null reference exception", f"Action: Add null check at line {line}"]
+
+def _type_suggestions(file_path, line):
+    return ["Type conversion issue", "Action: Check type compatibility"]
+
+# Checked in order against the lowercased description; first match wins
+_PATTERNS = [
+    ("not defined", _missing_import_suggestions),
+    ("does not exist", _missing_import_suggestions),
+    ("null reference", _null_ref_suggestions),
+    ("type mismatch", _type_suggestions),
+    ("cannot convert", _type_suggestions),
+]
+
 class AutonomousDebugAgent:
+    # Fixed attribute set - no per-instance __dict__, faster lookups on the WebSocket path
+    __slots__ = ("ws", "running", "current_state", "error_history", "_http", "_msgs", "_handlers")
+
     def __init__(self):
         self.ws = None
         self.running = False
         self.current_state = {}
         self.error_history = []
+        self._http = None
+        self._msgs = asyncio.Queue(maxsize=256)  # Decoded WebSocket messages awaiting handlers
+        self._handlers = {
+            "connected": self._on_connected,
+            "stateChange": self._on_state_change
+        }
+
+    async def __aenter__(self):
+        self._http = aiohttp.ClientSession(
+            base_url=BASE_URL,
+            headers=HEADERS,
+            connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=30)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._http.close()
+
+    @staticmethod
+    def _json_body(obj):
+        # Content type travels with the payload, so no per-call headers dict is merged
+        return aiohttp.BytesPayload(dumps(obj), content_type="application/json")
 
-    def execute_command(self, action, **kwargs):
+    async def execute_command(self, action, **kwargs):
         """Execute single command"""
         cmd = {"action": action, **kwargs}
-        resp = requests.post(f"{BASE_URL}/command", json=cmd, headers=HEADERS)
-        return resp.json()
+        async with self._http.post("/command", data=self._json_body(cmd)) as resp:
+            return loads(await resp.read())
 
-    def batch_execute(self, commands):
+    async def batch_execute(self, commands):
         """Execute batch commands"""
         batch = {"commands": commands, "stopOnError": False}  # Continue on error
-        resp = requests.post(f"{BASE_URL}/batch", json=batch, headers=HEADERS)
-        return resp.json()
+        async with self._http.post("/batch", data=self._json_body(batch)) as resp:
+            return loads(await resp.read())
 
-    def get_errors(self):
+    async def get_errors(self):
         """Get current build errors"""
-        resp = requests.get(f"{BASE_URL}/errors", headers=HEADERS)
-        return resp.json()
-
-    def get_output(self, pane="Build"):
-        """Get output window content"""
-        resp = requests.get(f"{BASE_URL}/output/{pane}", headers=HEADERS)
-        if resp.status_code == 200:
-            return resp.text
-        return None
-
-    def get_logs(self):
+        async with self._http.get("/errors") as resp:
+            return loads(await resp.read())
+
+    @staticmethod
+    def _range_header(max_bytes):
+        return {"Range": f"bytes=0-{max_bytes - 1}"} if max_bytes else None
+
+    async def get_output_text(self, pane="Build", max_bytes=None):
+        """Get output window content (only the first max_bytes when given)"""
+        async with self._http.get(f"/output/{pane}", headers=self._range_header(max_bytes)) as resp:
+            if resp.status not in (200, 206):
+                return None
+            if max_bytes is None:
+                return await resp.text()
+
+            # The bridge may ignore Range and send the whole pane - stop reading at the cap
+            data = bytearray()
+            async for chunk in resp.content.iter_chunked(65536):
+                data += chunk
+                if len(data) >= max_bytes:
+                    break
+            return data[:max_bytes].decode("utf-8", errors="ignore")
+
+    async def contains_error_in_build(self, max_bytes=None):
+        """Scan the Build pane for "error" chunk by chunk, stopping at the first hit"""
+        async with self._http.get("/output/Build", headers=self._range_header(max_bytes)) as resp:
+            if resp.status not in (200, 206):
+                return False
+            tail = b""
+            remaining = max_bytes
+            async for chunk in resp.content.iter_chunked(65536):
+                if remaining is not None:
+                    chunk = chunk[:remaining]
+                    remaining -= len(chunk)
+                window = tail + chunk.lower()
+                if b"error" in window:
+                    return True
+                if remaining == 0:
+                    break
+                tail = window[-4:]  # Catch a match split across chunks
+        return False
+
+    async def get_logs(self):
         """Get recent request logs"""
-        resp = requests.get(f"{BASE_URL}/logs", headers=HEADERS)
-        return resp.json()
+        async with self._http.get("/logs") as resp:
+            return loads(await resp.read())
 
     def analyze_error(self, error_item):
         """Analyze an error and suggest fixes"""
-        description = error_item.get('description', '')
-        file_path = error_item.get('file', '')
-        line = error_item.get('line', 0)
-
-        print(f"\n🔍 Analyzing error:")
-        print(f"   File: {file_path}:{line}")
-        print(f"   Error: {description}")
-
-        # Simple pattern matching (in real agent, use LLM here)
-        suggestions = []
-
-        if "not defined" in description.lower() or "does not exist" in description.lower():
-            suggestions.append("Missing import or undefined variable")
-            suggestions.append(f"Action: Check imports at {file_path}")
-
-        elif "null reference" in description.lower():
-            suggestions.append("Null reference exception")
-            suggestions.append(f"Action: Add null check at line {line}")
-
-        elif "type mismatch" in description.lower() or "cannot convert" in description.lower():
-            suggestions.append("Type conversion issue")
-            suggestions.append("Action: Check type compatibility")
-
-        return suggestions
+        self._log_error(error_item)
+        return self._suggest(error_item)
+
+    def _suggest(self, error_item):
+        # Simple pattern matching - lowercase once, then walk the pattern table
+        desc_lc = error_item.get('description', '').lower()
+        for needle, handler in _PATTERNS:
+            if needle in desc_lc:
+                return handler(error_item.get('file', ''), error_item.get('line', 0))
+
+        return []
+
+    def _log_error(self, error_item):
+        log.info("\n🔍 Analyzing error:\n   File: %s:%s\n   Error: %s",
+                 error_item.get('file', ''), error_item.get('line', 0), error_item.get('description', ''))
+
+    def report_errors(self, errors):
+        """Log each error with its top suggestions"""
+        for error in errors:
+            for suggestion in self.analyze_error(error)[:2]:
+                log.info("      💡 %s", suggestion)
+
+    async def read_messages(self, ws):
+        """Drain WebSocket frames into the queue - decode only, no handler work"""
+        async for message in ws:
+            # Heartbeats carry nothing but the type - skip parsing them
+            if message.startswith('{"type":"pong"'):
+                continue
+            await self._msgs.put(loads(message))
+
+    async def dispatch_messages(self):
+        """Run the handler for each queued message, in arrival order"""
+        while True:
+            data = await self._msgs.get()
+            handler = self._handlers.get(data.get("type"))
+            try:
+                if handler:
+                    await handler(data)
+            except Exception:
+                # One bad event must not take down the loop - report it and keep going
+                log.exception("❌ Handler for '%s' failed", data.get("type"))
+            finally:
+                self._msgs.task_done()
+
+    async def _on_connected(self, data):
+        log.info("✅ Agent connected: %s", data['connectionId'])
+
+    async def _on_state_change(self, data):
+        snapshot = data["snapshot"]
+        self.current_state = snapshot
+        mode = snapshot["mode"]
+        if mode == "Break":
+            # Breakpoint hit - analyze context
+            exc = snapshot.get('exception')
+            if exc:
+                log.info("\n🔔 State: %s\n   ⚠️  Exception: %s", mode, exc)
+                await self.handle_exception(snapshot)
+            else:
+                fpath = snapshot.get('file')
+                line = snapshot.get('line')
+                log.info("\n🔔 State: %s\n   📍 %s:%s", mode, fpath, line)
+
+        elif mode == "Design":
+            # Debugging stopped - analyze results
+            log.info("\n🔔 State: %s\n   ⏹️  Session ended", mode)
+            await self.analyze_session()
 
-    def on_message(self, ws, message):
-        """Handle WebSocket messages"""
-        data = json.loads(message)
-        event_type = data.get("type")
-
-        if event_type == "connected":
-            print(f"✅ Agent connected: {data['connectionId']}")
-
-        elif event_type == "stateChange":
-            snapshot = data["snapshot"]
-            self.current_state = snapshot
-            mode = snapshot["mode"]
-
-            print(f"\n🔔 State: {mode}")
-
-            if mode == "Break":
-                # Breakpoint hit - analyze context
-                exception = snapshot.get('exception')
-                if exception:
-                    print(f"   ⚠️  Exception: {exception}")
-                    self.handle_exception(snapshot)
-                else:
-                    print(f"   📍 {snapshot.get('file')}:{snapshot.get('line')}")
-
-            elif mode == "Design":
-                # Debugging stopped - analyze results
-                print("   ⏹️  Session ended")
-                self.analyze_session()
+        else:
+            log.info("\n🔔 State: %s", mode)
 
-    def handle_exception(self, snapshot):
+    async def handle_exception(self, snapshot):
         """Handle exception breakpoint"""
         exception = snapshot.get('exception', '')
         locals_dict = snapshot.get('locals', {})
 
-        print(f"\n🐛 Exception Handler:")
-        print(f"   Type: {exception}")
-        print(f"   Local variables: {list(locals_dict.keys())[:10]}")
+        log.info("\n🐛 Exception Handler:\n   Type: %s", exception)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("   Local variables: %s", list(islice(locals_dict, 10)))
 
         # In real agent: send context to LLM for analysis
         # LLM would analyze stack trace, locals, exception type
@@ -132,68 +227,80 @@ class AutonomousDebugAgent:
 
         # Simplified pattern matching
         if "NullReferenceException" in exception:
-            print("\n💡 Suggestion: Add null checks before object access")
-            print("   Example: if (obj != null) { obj.Method(); }")
+            log.info("\n💡 Suggestion: Add null checks before object access\n"
+                     "   Example: if (obj != null) { obj.Method(); }")
 
         elif "IndexOutOfRangeException" in exception:
-            print("\n💡 Suggestion: Validate array/list bounds")
-            print("   Example: if (index >= 0 && index < array.Length)")
+            log.info("\n💡 Suggestion: Validate array/list bounds\n"
+                     "   Example: if (index >= 0 && index < array.Length)")
 
-    def analyze_session(self):
+    async def analyze_session(self):
         """Analyze debugging session after completion"""
-        print("\n📊 Session Analysis:")
+        log.info("\n📊 Session Analysis:")
+
+        # Errors, build output and request logs are independent - fetch them concurrently
+        errors, build_has_errors, logs = await asyncio.gather(
+            self.get_errors(),
+            self.contains_error_in_build(),  # Full scan: MSBuild reports later errors near the end
+            self.get_logs(),
+            return_exceptions=True  # One failed request shouldn't sink the whole analysis
+        )
 
-        # Get build errors
-        errors = self.get_errors()
-        if errors:
-            print(f"   ⚠️  {len(errors)} errors/warnings found:")
-            for error in errors[:5]:
-                suggestions = self.analyze_error(error)
-                for suggestion in suggestions[:2]:
-                    print(f"      💡 {suggestion}")
-
-        # Get output logs
-        build_output = self.get_output("Build")
-        if build_output and "error" in build_output.lower():
-            print("   📝 Build output contains errors (check /output/Build)")
-
-        # Get request logs to analyze agent behavior
-        logs = self.get_logs()
-        if logs:
-            avg_time = sum(log.get('durationMs', 0) for log in logs) / len(logs)
-            print(f"   ⏱️  Average API response time: {avg_time:.1f}ms")
-
-        print("\n✅ Analysis complete")
-
-    def run_debugging_cycle(self):
+        # Build errors
+        if isinstance(errors, Exception):
+            log.error("   ❌ Could not fetch errors: %s", errors)
+        elif errors:
+            log.info("   ⚠️  %d errors/warnings found:", len(errors))
+            self.report_errors(errors[:5])
+
+        # Build output
+        if isinstance(build_has_errors, Exception):
+            log.error("   ❌ Could not scan build output: %s", build_has_errors)
+        elif build_has_errors:
+            log.info("   📝 Build output contains errors (check /output/Build)")
+
+        # Request logs to analyze agent behavior
+        if isinstance(logs, Exception):
+            log.error("   ❌ Could not fetch logs: %s", logs)
+        elif logs:
+            avg_time = sum(entry.get('durationMs', 0) for entry in logs) / len(logs)
+            log.info("   ⏱️  Average API response time: %.1fms", avg_time)
+
+        log.info("\n✅ Analysis complete")
+
+    async def run_debugging_cycle(self):
         """Run a complete debugging cycle"""
         print("\n🔄 Starting automated debugging cycle...")
 
         # Step 1: Clean build
         print("\n1️⃣ Building solution...")
-        result = self.execute_command("build")
+        # The bridge builds synchronously, so the response arrives once the build is done
+        result = await self.execute_command("build")
         if result.get("ok"):
-            print("   ✅ Build triggered")
-        time.sleep(2)  # Wait for build
+            print("   ✅ Build finished")
 
         # Step 2: Check for errors
-        errors = self.get_errors()
+        errors = await self.get_errors()
         if errors:
             print(f"\n2️⃣ Found {len(errors)} errors - analyzing...")
-            for error in errors[:3]:
-                self.analyze_error(error)
+            self.report_errors(errors[:3])
         else:
             print("\n2️⃣ No build errors found!")
 
             # Step 3: Start debugging
             print("\n3️⃣ Starting debug session...")
-            self.batch_execute([
+            await self.batch_execute([
                 {"action": "clearBreakpoints"},
                 {"action": "setBreakpoint", "file": "C:\\Code\\Program.cs", "line": 42},
                 {"action": "start"}
             ])
 
-    def start(self):
+    @staticmethod
+    def _report_cycle_failure(task):
+        if not task.cancelled() and task.exception():
+            log.error("❌ Debugging cycle failed", exc_info=task.exception())
+
+    async def start(self):
         """Start the autonomous agent"""
         print("🤖 Autonomous Debugging Agent Starting...")
         print(f"   Base URL: {BASE_URL}")
@@ -202,31 +309,48 @@ class AutonomousDebugAgent:
 
         self.running = True
 
-        # Set up WebSocket in a separate thread
-        self.ws = websocket.WebSocketApp(
-            WS_URL,
-            on_message=self.on_message,
-            on_error=lambda ws, err: print(f"❌ WS Error: {err}"),
-            on_close=lambda ws, code, msg: print(f"🔌 Disconnected"),
-            on_open=lambda ws: print("🌐 WebSocket connected")
-        )
-
-        ws_thread = threading.Thread(target=self.ws.run_forever, daemon=True)
-        ws_thread.start()
-
-        time.sleep(1)  # Wait for connection
-
-        # Run debugging cycle
-        self.run_debugging_cycle()
-
-        print("\n📡 Monitoring for state changes... (Ctrl+C to stop)")
         try:
-            while self.running:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n👋 Stopping agent...")
-            self.ws.close()
+            async with websockets.connect(WS_URL, additional_headers=HEADERS) as ws:
+                self.ws = ws
+                print("🌐 WebSocket connected")
+
+                # Handlers run separately from the reader so slow analysis never stalls frames
+                dispatcher = asyncio.create_task(self.dispatch_messages())
+
+                # Run debugging cycle while the reader below keeps draining events;
+                # report a failure right away instead of when the socket closes
+                cycle = asyncio.create_task(self.run_debugging_cycle())
+                cycle.add_done_callback(self._report_cycle_failure)
+
+                print("\n📡 Monitoring for state changes... (Ctrl+C to stop)")
+                reader = asyncio.create_task(self.read_messages(ws))
+                try:
+                    # Ends when the socket closes - or early if the reader or dispatcher fails
+                    done, _ = await asyncio.wait({reader, dispatcher}, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()  # Re-raise a reader/dispatcher failure
+
+                    # Socket closed cleanly - let queued events and a running handler finish
+                    await self._msgs.join()
+                finally:
+                    reader.cancel()
+                    dispatcher.cancel()
+                    cycle.cancel()
+        except (OSError, websockets.WebSocketException) as err:
+            # Refused connection, rejected API key, dropped socket, ...
+            print(f"❌ WS Error: {err}")
+        finally:
+            self.running = False
+            print("🔌 Disconnected")
 
 if __name__ == "__main__":
-    agent = AutonomousDebugAgent()
-    agent.start()
+    logging.basicConfig(stream=sys.stdout, format="%(message)s")
+
+    async def main():
+        async with AutonomousDebugAgent() as agent:
+            await agent.start()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Stopping agent...")
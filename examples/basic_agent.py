@@ -3,32 +3,42 @@ Basic Agent Example - Agentic Debugger Bridge
 Demonstrates basic HTTP API usage for debugging control.
 """
 
+import asyncio
+from itertools import islice
 import requests
-import json
+from requests.adapters import HTTPAdapter
 import time
+import websockets  # pip install websockets
+from _discovery import load_discovery
+from _jsonlib import loads
 
 # Discovery: Read connection info
-import os
-import tempfile
-
-discovery_file = os.path.join(tempfile.gettempdir(), "agentic_debugger.json")
-with open(discovery_file, 'r') as f:
-    discovery = json.load(f)
+discovery = load_discovery()
 
 BASE_URL = f"http://localhost:{discovery['port']}"
+WS_URL = f"ws://localhost:{discovery['port']}/ws"
 API_KEY = discovery['defaultApiKey']
 HEADERS = {discovery['keyHeader']: API_KEY}
 
+_session = requests.Session()
+_session.headers.update(HEADERS)
+# Single host, sequential calls: a small pool is enough to keep one connection alive
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+
+def get_session():
+    """Shared HTTP session (keep-alive + connection pooling)"""
+    return _session
+
 def get_state():
     """Get current debugger state"""
-    resp = requests.get(f"{BASE_URL}/state", headers=HEADERS)
-    return resp.json()
+    resp = _session.get(f"{BASE_URL}/state")
+    return loads(resp.content)
 
 def execute_command(action, **kwargs):
     """Execute a debugger command"""
     cmd = {"action": action, **kwargs}
-    resp = requests.post(f"{BASE_URL}/command", json=cmd, headers=HEADERS)
-    return resp.json()
+    resp = _session.post(f"{BASE_URL}/command", json=cmd)
+    return loads(resp.content)
 
 def batch_execute(commands, stop_on_error=True):
     """Execute multiple commands in a single request"""
@@ -36,18 +46,35 @@ def batch_execute(commands, stop_on_error=True):
         "commands": commands,
         "stopOnError": stop_on_error
     }
-    resp = requests.post(f"{BASE_URL}/batch", json=batch, headers=HEADERS)
-    return resp.json()
+    resp = _session.post(f"{BASE_URL}/batch", json=batch)
+    return loads(resp.content)
 
 def get_errors():
     """Get build/compilation errors"""
-    resp = requests.get(f"{BASE_URL}/errors", headers=HEADERS)
-    return resp.json()
+    resp = _session.get(f"{BASE_URL}/errors")
+    return loads(resp.content)
 
 def get_metrics():
     """Get performance metrics"""
-    resp = requests.get(f"{BASE_URL}/metrics", headers=HEADERS)
-    return resp.json()
+    resp = _session.get(f"{BASE_URL}/metrics")
+    return loads(resp.content)
+
+async def wait_for_mode(expected_mode, timeout, action=None):
+    """Wait for a stateChange push with the given mode; returns the snapshot or None on timeout.
+    If action is given, it is executed only after the WebSocket is connected, so its push can't be missed."""
+    async def listen():
+        async with websockets.connect(WS_URL, additional_headers=HEADERS) as ws:
+            if action:
+                await asyncio.to_thread(execute_command, action)
+            async for msg in ws:
+                data = loads(msg)
+                if data.get("type") == "stateChange" and data["snapshot"]["mode"] == expected_mode:
+                    return data["snapshot"]
+
+    try:
+        return await asyncio.wait_for(listen(), timeout)
+    except asyncio.TimeoutError:
+        return None
 
 # Example workflow
 if __name__ == "__main__":
@@ -103,25 +130,16 @@ if __name__ == "__main__":
     print(f"📊 Active WebSocket connections: {metrics['activeWebSocketConnections']}")
     print()
 
-    # Example 5: Polling for state changes (old way - use WebSocket instead!)
-    print("Example 5: Polling for state changes (not recommended)")
+    # Example 5: Waiting for state changes via WebSocket push
+    print("Example 5: Waiting for a breakpoint")
     print("Starting debug session...")
-    execute_command("start")
-
-    print("Polling for state changes... (this is slow, use WebSocket instead!)")
-    for i in range(10):
-        state = get_state()
-        mode = state['snapshot']['mode']
-        print(f"  Poll {i+1}: mode = {mode}")
-
-        if mode == "Break":
-            print("🛑 Hit breakpoint!")
-            # Get locals
-            locals_dict = state['snapshot']['locals']
-            print(f"Locals: {list(locals_dict.keys())[:5]}")
-            break
-
-        time.sleep(0.5)  # 500ms polling interval - wasteful!
+    snapshot = asyncio.run(wait_for_mode("Break", 5.0, action="start"))
+    if snapshot:
+        print("🛑 Hit breakpoint!")
+        locals_dict = snapshot['locals']
+        print(f"Locals: {list(islice(locals_dict, 5))}")
+    else:
+        print("⏱️  No breakpoint hit within 5s")
 
     print()
     print("💡 Tip: Use WebSocket for real-time updates (see websocket_agent.py)")
@@ -4,69 +4,96 @@ Demonstrates real-time debugging with WebSocket push notifications.
 """
 
 import requests
-import json
-import tempfile
-import os
+from requests.adapters import HTTPAdapter
+import sys
 import websocket  # pip install websocket-client
+from _discovery import load_discovery
+from _jsonlib import loads
 
 # Discovery
-discovery_file = os.path.join(tempfile.gettempdir(), "agentic_debugger.json")
-with open(discovery_file, 'r') as f:
-    discovery = json.load(f)
+discovery = load_discovery()
 
 BASE_URL = f"http://localhost:{discovery['port']}"
 WS_URL = f"ws://localhost:{discovery['port']}/ws"
 API_KEY = discovery['defaultApiKey']
 HEADERS = {discovery['keyHeader']: API_KEY}
 
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
+def get_session():
+    """Shared HTTP session (keep-alive + connection pooling)"""
+    return _session
+
 def execute_command(action, **kwargs):
     """Execute a debugger command via HTTP"""
     cmd = {"action": action, **kwargs}
-    resp = requests.post(f"{BASE_URL}/command", json=cmd, headers=HEADERS)
-    return resp.json()
+    resp = _session.post(f"{BASE_URL}/command", json=cmd)
+    return loads(resp.content)
 
 def batch_execute(commands):
     """Execute batch commands"""
     batch = {"commands": commands, "stopOnError": True}
-    resp = requests.post(f"{BASE_URL}/batch", json=batch, headers=HEADERS)
-    return resp.json()
+    resp = _session.post(f"{BASE_URL}/batch", json=batch)
+    return loads(resp.content)
 
 # WebSocket event handlers
+def on_connected(data):
+    print(f"✅ Connected! ID: {data['connectionId']}")
+
+def on_state_change(data):
+    snapshot = data["snapshot"]
+    mode = snapshot["mode"]
+
+    # Collect the report and write it in one go
+    out = [f"\n🔔 State Change: {mode}"]
+
+    if mode == "Break":
+        # Read each field once
+        fpath = snapshot.get('file', 'unknown')
+        line = snapshot.get('line', '?')
+        loc = snapshot.get('locals') or {}
+        stack = snapshot.get('stack') or ()
+
+        out.append(f"   📍 File: {fpath}")
+        out.append(f"   📍 Line: {line}")
+        out.append(f"   🔍 Locals: {len(loc)} variables")
+
+        # Show stack trace
+        if stack:
+            out.append("   📚 Stack:")
+            for i, frame in enumerate(stack[:3], 1):  # Top 3 frames
+                out.append(f"      {i}. {frame}")
+
+    elif mode == "Run":
+        out.append("   ▶️  Execution continuing...")
+
+    elif mode == "Design":
+        notes = snapshot.get('notes', '')
+        out.append(f"   ⏹️  {notes}")
+        # Could trigger cleanup, analysis, etc.
+
+    out.append("")
+    sys.stdout.write("\n".join(out))
+
+# Event type -> handler (pong is handled before parsing in on_message)
+EVENT_HANDLERS = {
+    "connected": on_connected,
+    "stateChange": on_state_change,
+}
+
 def on_message(ws, message):
     """Handle incoming WebSocket messages"""
-    data = json.loads(message)
-    event_type = data.get("type")
-
-    if event_type == "connected":
-        print(f"✅ Connected! ID: {data['connectionId']}")
-
-    elif event_type == "stateChange":
-        snapshot = data["snapshot"]
-        mode = snapshot["mode"]
-        print(f"\n🔔 State Change: {mode}")
-
-        if mode == "Break":
-            print(f"   📍 File: {snapshot.get('file', 'unknown')}")
-            print(f"   📍 Line: {snapshot.get('line', '?')}")
-            print(f"   🔍 Locals: {len(snapshot.get('locals', {}))} variables")
-
-            # Show stack trace
-            stack = snapshot.get('stack', [])
-            if stack:
-                print(f"   📚 Stack:")
-                for i, frame in enumerate(stack[:3]):  # Top 3 frames
-                    print(f"      {i+1}. {frame}")
-
-        elif mode == "Run":
-            print("   ▶️  Execution continuing...")
-
-        elif mode == "Design":
-            notes = snapshot.get('notes', '')
-            print(f"   ⏹️  {notes}")
-            # Could trigger cleanup, analysis, etc.
-
-    elif event_type == "pong":
+    # Heartbeats carry nothing but the type - skip parsing them
+    if message.startswith('{"type":"pong"'):
         print("💓 Heartbeat OK")
+        return
+
+    data = loads(message)
+    handler = EVENT_HANDLERS.get(data.get("type"))
+    if handler:
+        handler(data)
 
 def on_error(ws, error):
     print(f"❌ WebSocket error: {error}")